@@ -7,15 +7,22 @@ existing churn demo.
 from __future__ import annotations
 
 import argparse
-import json
+import hashlib
+import inspect
+import logging
 import os
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Dict, List
 
+import numpy as np
+import orjson
 import pandas as pd
-from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+import sklearn
+from joblib import dump, load
+from sklearn.metrics import accuracy_score, confusion_matrix
 
 from main import (
     CATEGORICAL_FEATURES,
@@ -32,11 +39,16 @@ from main import (
 DEFAULT_SENSITIVE_FEATURES = ["region", "customer_segment"]
 
 
-def _json_default(obj: Any) -> str:
+def _json_default(obj: Any) -> Any:
     """Fallback serializer for non-JSON-native objects."""
     try:
         if isinstance(obj, Path):
             return str(obj)
+        # orjson hands object-dtype arrays (e.g. group labels) back to us.
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        if isinstance(obj, np.generic):
+            return obj.item()
         if hasattr(obj, "__name__") and isinstance(obj, type):
             return obj.__name__
         return str(obj)
@@ -44,6 +56,22 @@ def _json_default(obj: Any) -> str:
         return "<unserializable>"
 
 
+_WRITE_BUFFER_SIZE = 1 << 20
+
+
+def _dump_json(obj: Any, path: Path) -> None:
+    """Write ``obj`` as indented JSON via orjson."""
+    payload = orjson.dumps(
+        obj,
+        default=_json_default,
+        option=orjson.OPT_INDENT_2
+        | orjson.OPT_SERIALIZE_NUMPY
+        | orjson.OPT_NON_STR_KEYS,
+    )
+    with path.open("wb", buffering=_WRITE_BUFFER_SIZE) as handle:
+        handle.write(payload)
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description=(
@@ -95,6 +123,20 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--skip-giskard", action="store_true", help="Skip Giskard scan.")
     parser.add_argument("--skip-credo", action="store_true", help="Skip governance card.")
     parser.add_argument("--skip-sbom", action="store_true", help="Skip SBOM generation.")
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help=(
+            "Reuse synthesised data and the trained model from --cache-dir "
+            "(local joblib pickles; never point this at shared storage)."
+        ),
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=Path(".cache") / "assurance",
+        help="Local directory for the --cache pickles (kept outside artifacts/).",
+    )
     return parser.parse_args()
 
 
@@ -106,8 +148,19 @@ def _positive_label(class_labels: List[str]) -> str:
     return "positive"
 
 
-def _binarize(series: pd.Series, positive_label: str) -> pd.Series:
-    return series.reset_index(drop=True).astype(str).str.lower() == positive_label
+def _binarize(values: Any, positive_label: str) -> np.ndarray:
+    # Lowercase the handful of distinct categories once, then compare integer
+    # codes, instead of running the pandas string kernels over every row.
+    # Accepts a Series or the raw prediction array, so callers need not wrap it.
+    categorical = pd.Categorical(np.asarray(values))
+    positive_codes = np.flatnonzero(
+        categorical.categories.astype(str).str.lower() == positive_label
+    )
+    return np.isin(categorical.codes, positive_codes)
+
+
+def _between_groups_difference(series: pd.Series) -> float:
+    return float(series.max() - series.min()) if not series.empty else 0.0
 
 
 def run_fairlearn_checks(
@@ -121,8 +174,6 @@ def run_fairlearn_checks(
     try:
         from fairlearn.metrics import (
             MetricFrame,
-            demographic_parity_difference,
-            equalized_odds_difference,
             false_positive_rate,
             selection_rate,
             true_positive_rate,
@@ -143,22 +194,32 @@ def run_fairlearn_checks(
     class_labels = evaluation_outputs.get("class_labels", [])
     positive_label = _positive_label(class_labels)
     y_true_bool = _binarize(test_df[LABEL_COLUMN], positive_label)
-    y_pred_bool = _binarize(
-        pd.Series(evaluation_outputs["predictions"]), positive_label
-    )
-
+    y_pred_bool = _binarize(evaluation_outputs["predictions"], positive_label)
+
+    # One confusion-matrix pass instead of four separate sklearn scorers.
+    tn, fp, fn, tp = confusion_matrix(
+        y_true_bool, y_pred_bool, labels=[False, True]
+    ).ravel()
+    total = tn + fp + fn + tp
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
     overall = {
-        "accuracy": accuracy_score(y_true_bool, y_pred_bool),
-        "precision": precision_score(y_true_bool, y_pred_bool, zero_division=0),
-        "recall": recall_score(y_true_bool, y_pred_bool, zero_division=0),
-        "f1": f1_score(y_true_bool, y_pred_bool, zero_division=0),
+        "accuracy": float((tp + tn) / total) if total else 0.0,
+        "precision": float(precision),
+        "recall": float(recall),
+        "f1": float(2 * precision * recall / (precision + recall))
+        if precision + recall
+        else 0.0,
     }
 
+    # Align the sensitive columns to the positional label arrays once.
+    sensitive_df = test_df.reset_index(drop=True)
+
     fairness_by_feature: Dict[str, Any] = {}
     for feature in sensitive_features:
-        if feature not in test_df.columns:
+        if feature not in sensitive_df.columns:
             continue
-        sensitive = test_df[feature].reset_index(drop=True)
+        sensitive = sensitive_df[feature]
         metric_frame = MetricFrame(
             metrics={
                 "accuracy": accuracy_score,
@@ -175,28 +236,28 @@ def run_fairlearn_checks(
             columns={"index": feature}
         )
         by_group_path = artifact_dir / f"{feature}_fairness_groups.csv"
-        by_group_df.to_csv(by_group_path, index=False)
-
-        tpr_series = metric_frame.by_group["true_positive_rate"]
-        equal_opportunity_difference = float(
-            tpr_series.max() - tpr_series.min()
-        ) if not tpr_series.empty else 0.0
+        with by_group_path.open(
+            "w", encoding="utf-8", newline="", buffering=_WRITE_BUFFER_SIZE
+        ) as handle:
+            by_group_df.to_csv(handle, index=False)
+
+        # Derive the Fairlearn scalar disparities from the groupwise table we
+        # already have instead of letting each helper rebuild a MetricFrame.
+        group_metrics = metric_frame.by_group
+        selection_rate_gap = _between_groups_difference(group_metrics["selection_rate"])
+        tpr_gap = _between_groups_difference(group_metrics["true_positive_rate"])
+        fpr_gap = _between_groups_difference(group_metrics["false_positive_rate"])
 
         fairness_by_feature[feature] = {
             "overall": metric_frame.overall.to_dict(),
-            "by_group": by_group_df.to_dict(orient="records"),
+            # Column-oriented arrays; orjson serialises numeric ones natively.
+            "by_group": {
+                column: by_group_df[column].to_numpy() for column in by_group_df.columns
+            },
             "disparity": {
-                "demographic_parity_difference": float(
-                    demographic_parity_difference(
-                        y_true_bool, y_pred_bool, sensitive_features=sensitive
-                    )
-                ),
-                "equalized_odds_difference": float(
-                    equalized_odds_difference(
-                        y_true_bool, y_pred_bool, sensitive_features=sensitive
-                    )
-                ),
-                "equal_opportunity_difference": equal_opportunity_difference,
+                "demographic_parity_difference": selection_rate_gap,
+                "equalized_odds_difference": max(tpr_gap, fpr_gap),
+                "equal_opportunity_difference": tpr_gap,
             },
             "by_group_csv": str(by_group_path),
         }
@@ -209,10 +270,21 @@ def run_fairlearn_checks(
         "artifact_dir": str(artifact_dir),
     }
     report_path = artifact_dir / "fairlearn_report.json"
-    report_path.write_text(json.dumps(report, indent=2, default=_json_default))
+    _dump_json(report, report_path)
     return report
 
 
+def _ensure_utf8_console() -> None:
+    """Switch stdout/stderr to UTF-8 so Giskard's emoji logs don't crash on Windows."""
+    try:
+        os.environ.setdefault("PYTHONIOENCODING", "utf-8")
+        for stream in (sys.stdout, sys.stderr):
+            if hasattr(stream, "reconfigure"):
+                stream.reconfigure(encoding="utf-8", errors="replace")
+    except Exception:
+        pass
+
+
 def run_giskard_security_scan(
     *,
     model,
@@ -235,7 +307,7 @@ def run_giskard_security_scan(
             "artifact_dir": str(artifact_dir),
         }
         summary_path = artifact_dir / "giskard_summary.json"
-        summary_path.write_text(json.dumps(summary, indent=2, default=_json_default))
+        _dump_json(summary, summary_path)
         (artifact_dir / "GISKARD_UNSUPPORTED.txt").write_text(summary["note"])
         return summary
 
@@ -255,18 +327,12 @@ def run_giskard_security_scan(
             "artifact_dir": str(artifact_dir),
         }
 
-    # Ensure UTF-8 console encoding so Giskard's emoji logs don't crash on Windows.
-    try:
-        os.environ.setdefault("PYTHONIOENCODING", "utf-8")
-        for stream in (sys.stdout, sys.stderr):
-            if hasattr(stream, "reconfigure"):
-                stream.reconfigure(encoding="utf-8", errors="replace")
-    except Exception:
-        pass
+    # Resolve the feature columns once; Giskard calls predict_fn many times
+    # during the scan and drop() would rebuild the frame on every call.
+    feature_cols = pd.Index([c for c in test_df.columns if c != LABEL_COLUMN])
 
     def predict_fn(df: pd.DataFrame):
-        features = df.drop(columns=[LABEL_COLUMN], errors="ignore")
-        return model.predict_proba(features)
+        return model.predict_proba(df[feature_cols])
 
     try:
         dataset = Dataset(
@@ -279,7 +345,7 @@ def run_giskard_security_scan(
         wrapped_model = Model(
             model=predict_fn,
             model_type="classification",
-            feature_names=list(test_df.drop(columns=[LABEL_COLUMN]).columns),
+            feature_names=list(feature_cols),
             classification_labels=list(getattr(model, "classes_", [])),
             name="logreg_churn_demo",
         )
@@ -304,7 +370,7 @@ def run_giskard_security_scan(
             summary["error"] = f"scan failed: {scan_exc}"
 
         summary_path = artifact_dir / "giskard_summary.json"
-        summary_path.write_text(json.dumps(summary, indent=2, default=_json_default))
+        _dump_json(summary, summary_path)
         return summary
     except Exception as exc:  # pragma: no cover - defensive guardrails
         error_path = artifact_dir / "GISKARD_ERROR.txt"
@@ -320,20 +386,46 @@ def run_giskard_security_scan(
         }
 
 
-def generate_sbom(*, output_dir: Path, fmt: str) -> Dict[str, Any]:
-    output_dir.mkdir(parents=True, exist_ok=True)
-    sbom_path = output_dir / f"sbom.{fmt}"
-    fmt_arg = fmt.upper()
-    command = [
-        sys.executable,
-        "-m",
-        "cyclonedx_py",
-        "environment",
-        "--of",
-        fmt_arg,
-        "-o",
-        str(sbom_path),
-    ]
+class _LogMessageCollector(logging.Handler):
+    """Keep the messages of emitted records so they can go into a summary."""
+
+    def __init__(self, level: int = logging.ERROR) -> None:
+        super().__init__(level)
+        self.messages: List[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.messages.append(record.getMessage())
+
+
+def _run_cyclonedx_in_process(cli_args: List[str]) -> tuple[int, str]:
+    """Call the cyclonedx-py CLI entry point without a new interpreter."""
+    # cyclonedx-bom exposes no public Python API, so reuse the runner behind
+    # `python -m cyclonedx_py`. An ImportError (package missing or the internal
+    # module moved) lets the caller fall back to the subprocess path.
+    from cyclonedx_py._internal.cli import run as cyclonedx_run
+
+    # sys.stdout/sys.stderr are not redirected: the other assurance steps run
+    # concurrently and would have their console output captured as well.
+    # Instead, failures are read off the "CDX" logger, which run() reports
+    # through with logger.critical() before returning 1. SystemExit is only
+    # raised by argparse for invalid arguments.
+    cdx_logger = logging.getLogger("CDX")
+    collector = _LogMessageCollector()
+    cdx_logger.addHandler(collector)
+    try:
+        exit_code = cyclonedx_run(argv=cli_args, prog="cyclonedx-py")
+    except SystemExit as exit_:
+        if exit_.code is None or isinstance(exit_.code, int):
+            return exit_.code or 0, ""
+        return 1, str(exit_.code)
+    finally:
+        cdx_logger.removeHandler(collector)
+    return exit_code or 0, "\n".join(collector.messages)
+
+
+def _run_cyclonedx_subprocess(
+    command: List[str], sbom_path: Path, output_dir: Path
+) -> Dict[str, Any]:
     try:
         result = subprocess.run(
             command, check=True, capture_output=True, text=True, encoding="utf-8"
@@ -344,6 +436,7 @@ def generate_sbom(*, output_dir: Path, fmt: str) -> Dict[str, Any]:
             "stdout": result.stdout,
             "stderr": result.stderr,
             "command": " ".join(command),
+            "mode": "subprocess",
         }
     except FileNotFoundError:
         fallback_path = output_dir / "sbom_requirements_freeze.txt"
@@ -365,9 +458,34 @@ def generate_sbom(*, output_dir: Path, fmt: str) -> Dict[str, Any]:
         }
     except subprocess.CalledProcessError as exc:
         summary = {"status": "error", "reason": str(exc), "stderr": exc.stderr}
+    return summary
+
+
+def generate_sbom(*, output_dir: Path, fmt: str) -> Dict[str, Any]:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    sbom_path = output_dir / f"sbom.{fmt}"
+    fmt_arg = fmt.upper()
+    cli_args = ["environment", "--of", fmt_arg, "-o", str(sbom_path)]
+    command = [sys.executable, "-m", "cyclonedx_py", *cli_args]
+
+    try:
+        exit_code, error_message = _run_cyclonedx_in_process(cli_args)
+    except ImportError:
+        summary = _run_cyclonedx_subprocess(command, sbom_path, output_dir)
+    else:
+        summary = {
+            "status": "completed" if exit_code == 0 else "error",
+            "sbom_file": str(sbom_path),
+            "command": " ".join(command),
+            "mode": "in_process",
+        }
+        if exit_code != 0:
+            summary["reason"] = (
+                error_message or f"cyclonedx-py exited with code {exit_code}"
+            )
 
     summary_path = output_dir / "sbom_summary.json"
-    summary_path.write_text(json.dumps(summary, indent=2, default=_json_default))
+    _dump_json(summary, summary_path)
     return summary
 
 
@@ -399,7 +517,7 @@ def generate_governance_report(
     }
 
     json_path = artifact_dir / "model_governance_report.json"
-    json_path.write_text(json.dumps(report, indent=2, default=_json_default))
+    _dump_json(report, json_path)
 
     md_path = artifact_dir / "model_governance_report.md"
     md_path.write_text(
@@ -427,11 +545,36 @@ def generate_governance_report(
     return report
 
 
-def main() -> None:
-    args = parse_args()
-    rng = ensure_reproducibility(args.random_state)
-    artifact_root = Path(args.artifact_dir)
-    artifact_root.mkdir(parents=True, exist_ok=True)
+def _training_cache_path(args: argparse.Namespace) -> Path:
+    key = hashlib.blake2b()
+    key.update(
+        repr(
+            (
+                args.samples,
+                args.test_size,
+                args.random_state,
+                args.tfidf_max_features,
+                args.logreg_c,
+                sklearn.__version__,
+                np.__version__,
+                pd.__version__,
+            )
+        ).encode("utf-8")
+    )
+    # Any edit to the data/training/evaluation code in main.py invalidates
+    # the cache instead of silently serving a stale model.
+    key.update(Path(inspect.getsourcefile(train_model)).read_bytes())
+    return Path(args.cache_dir) / f"{key.hexdigest()[:16]}.joblib"
+
+
+def prepare_model(args: argparse.Namespace, rng: np.random.Generator) -> tuple:
+    """Synthesise data and train the demo model, optionally via a local cache."""
+    cache_path = _training_cache_path(args) if args.cache else None
+    if cache_path is not None and cache_path.exists():
+        try:
+            return load(cache_path)
+        except Exception as exc:  # pragma: no cover - stale/corrupt cache
+            print(f"Önbellek okunamadı, model yeniden eğitiliyor: {exc}")
 
     synthetic_df = synthesize_customer_data(args.samples, rng)
     train_df, test_df = prepare_train_test_split(
@@ -446,28 +589,57 @@ def main() -> None:
     )
     evaluation_outputs = compute_evaluation_outputs(model, test_df)
 
-    fairlearn_summary = {"status": "skipped"}
-    if not args.skip_fairlearn:
-        fairlearn_summary = run_fairlearn_checks(
-            test_df=test_df,
-            evaluation_outputs=evaluation_outputs,
-            sensitive_features=args.sensitive_features,
-            artifact_dir=artifact_root / "fairlearn",
-        )
+    prepared = (train_df, test_df, model, model_summary, evaluation_outputs)
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        dump(prepared, cache_path)
+    return prepared
 
-    giskard_summary = {"status": "skipped"}
-    if not args.skip_giskard:
-        giskard_summary = run_giskard_security_scan(
-            model=model,
-            test_df=test_df,
-            artifact_dir=artifact_root / "giskard",
-        )
 
-    sbom_summary = {"status": "skipped"}
-    if not args.skip_sbom:
-        sbom_summary = generate_sbom(
-            output_dir=artifact_root / "sbom", fmt=args.sbom_format
-        )
+def main() -> None:
+    args = parse_args()
+    rng = ensure_reproducibility(args.random_state)
+    artifact_root = Path(args.artifact_dir)
+    artifact_root.mkdir(parents=True, exist_ok=True)
+
+    _, test_df, model, model_summary, evaluation_outputs = prepare_model(args, rng)
+
+    # Fairlearn, Giskard and the SBOM only read the trained model and test
+    # split, so they run side by side; governance aggregates their results.
+    skipped = {"status": "skipped"}
+    if not args.skip_giskard:
+        # Reconfigure the process-wide streams before any worker starts
+        # writing to them, rather than from inside the Giskard thread.
+        _ensure_utf8_console()
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        fairlearn_future = None
+        if not args.skip_fairlearn:
+            fairlearn_future = executor.submit(
+                run_fairlearn_checks,
+                test_df=test_df,
+                evaluation_outputs=evaluation_outputs,
+                sensitive_features=args.sensitive_features,
+                artifact_dir=artifact_root / "fairlearn",
+            )
+
+        giskard_future = None
+        if not args.skip_giskard:
+            giskard_future = executor.submit(
+                run_giskard_security_scan,
+                model=model,
+                test_df=test_df,
+                artifact_dir=artifact_root / "giskard",
+            )
+
+        sbom_future = None
+        if not args.skip_sbom:
+            sbom_future = executor.submit(
+                generate_sbom, output_dir=artifact_root / "sbom", fmt=args.sbom_format
+            )
+
+        fairlearn_summary = fairlearn_future.result() if fairlearn_future else skipped
+        giskard_summary = giskard_future.result() if giskard_future else skipped
+        sbom_summary = sbom_future.result() if sbom_future else skipped
 
     governance_summary = {"status": "skipped"}
     if not args.skip_credo:
@@ -488,7 +660,7 @@ def main() -> None:
         "artifact_root": str(artifact_root),
     }
     summary_path = artifact_root / "assurance_summary.json"
-    summary_path.write_text(json.dumps(summary, indent=2, default=_json_default))
+    _dump_json(summary, summary_path)
 
     print("Assurance tamamlandı. Özet dosyası:", summary_path.resolve())
     print("Adalet çıktı klasörü:", fairlearn_summary.get("artifact_dir"))
@@ -7,17 +7,25 @@ scans remain fast and do not disrupt the existing pipeline.
 
 from __future__ import annotations
 
-import json
 from functools import lru_cache
-from typing import Dict
+from typing import Dict, Tuple
 
-from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
+import orjson
 
-DEFAULT_LLM_MODEL = "sshleifer/tiny-gpt2"
+from llm_utils.constants import DEFAULT_LLM_MODEL
+
+_METRICS_PROMPT_PREAMBLE = (
+    "You are assisting an ML engineer. Summarise these evaluation metrics "
+    "for a churn model in 3 sentences with a risk note at the end:\n"
+)
 
 
 @lru_cache(maxsize=2)
 def _get_text_generation_pipeline(model_name: str = DEFAULT_LLM_MODEL):
+    # Imported lazily: transformers/torch take seconds to load, and importing
+    # llm_utils.constants must not pay for them.
+    from transformers import AutoModelForCausalLM, AutoTokenizer, pipeline
+
     tokenizer = AutoTokenizer.from_pretrained(model_name)
     # GPT-2 style models often lack a pad token; align to EOS to avoid warnings.
     if tokenizer.pad_token_id is None and tokenizer.eos_token_id is not None:
@@ -37,13 +45,18 @@ def ensure_model_ready(model_name: str = DEFAULT_LLM_MODEL) -> None:
     _get_text_generation_pipeline(model_name)
 
 
+@lru_cache(maxsize=128)
+def _prompt_for(metric_items: Tuple[Tuple[str, float], ...]) -> str:
+    metrics = dict(metric_items)
+    pretty_metrics = orjson.dumps(
+        metrics,
+        option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+    ).decode("utf-8")
+    return f"{_METRICS_PROMPT_PREAMBLE}{pretty_metrics}\n"
+
+
 def _build_metrics_prompt(metrics: Dict[str, float]) -> str:
-    pretty_metrics = json.dumps(metrics, sort_keys=True, indent=2)
-    return (
-        "You are assisting an ML engineer. Summarise these evaluation metrics "
-        "for a churn model in 3 sentences with a risk note at the end:\n"
-        f"{pretty_metrics}\n"
-    )
+    return _prompt_for(tuple(sorted(metrics.items())))
 
 
 def generate_metrics_summary(
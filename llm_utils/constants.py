@@ -0,0 +1,8 @@
+"""
+Dependency-free constants shared by the LLM helpers and the CLI entry points.
+
+Kept separate so scripts can read defaults (e.g. for argparse) without pulling
+in transformers/torch.
+"""
+
+DEFAULT_LLM_MODEL = "sshleifer/tiny-gpt2"
@@ -287,8 +287,13 @@ def compute_evaluation_outputs(model: Pipeline, test_data: pd.DataFrame) -> Dict
     features = test_data.drop(columns=[LABEL_COLUMN])
     labels = test_data[LABEL_COLUMN]
 
-    predictions = model.predict(features)
+    # A single predict_proba pass; indexing classes_ with the argmax is what
+    # LogisticRegression.predict() does, so values and dtype are unchanged and
+    # the pipeline transform runs only once.
     probabilities = model.predict_proba(features)
+    classes = model.named_steps["classifier"].classes_
+    predictions = classes[np.argmax(probabilities, axis=1)]
+    class_labels = list(classes)
 
     evaluation_metrics = {
         "accuracy": accuracy_score(labels, predictions),
@@ -309,7 +314,6 @@ def compute_evaluation_outputs(model: Pipeline, test_data: pd.DataFrame) -> Dict
         output_dict=True,
         zero_division=0,
     )
-    class_labels = list(model.named_steps["classifier"].classes_)
     conf_matrix = confusion_matrix(labels, predictions, labels=class_labels)
 
     probabilities_df = pd.DataFrame(
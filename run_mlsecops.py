@@ -2,126 +2,346 @@
 Run a small MLSecOps scan with NVIDIA Garak against the lightweight local LLM.
 
 The script wraps Garak's CLI so it works reliably on Windows by setting a UTF-8
-stdout encoding and changing the working directory to where the Garak package
-is installed (Garak expects its plugin folders to be relative to CWD).
+stdout encoding and launching Garak from the directory where the package is
+installed (Garak expects its plugin folders to be relative to CWD).
 """
 
 from __future__ import annotations
 
 import argparse
+import importlib.util
 import json
 import os
+import re
 import shutil
-import site
+import subprocess
 import sys
-from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict
+from typing import Any, BinaryIO, Dict, List
 
-import garak.cli
-from llm_utils import DEFAULT_LLM_MODEL, ensure_model_ready
+from llm_utils.constants import DEFAULT_LLM_MODEL
 
-try:
-    sys.stdout.reconfigure(encoding="utf-8")
-except Exception:
-    pass
-os.environ.setdefault("PYTHONIOENCODING", "utf-8")
+# Only touch the stream when it is not UTF-8 already (the usual Linux case);
+# Garak children get PYTHONIOENCODING explicitly in _run_garak.
+_stdout_encoding = getattr(sys.stdout, "encoding", "") or ""
+if _stdout_encoding.lower().replace("-", "") != "utf8":
+    try:
+        sys.stdout.reconfigure(encoding="utf-8")
+    except Exception:
+        pass
+    os.environ.setdefault("PYTHONIOENCODING", "utf-8")
 
+_GARAK_BASE_ARGV = (sys.executable, "-m", "garak", "--model_type", "huggingface")
+
+
+_ENSURED_DIRS: set[str] = set()
 
-@contextmanager
-def change_workdir(path: Path):
-    previous = Path.cwd()
-    os.chdir(path)
-    try:
-        yield
-    finally:
-        os.chdir(previous)
 
+def _ensure_dir(path: Path) -> None:
+    """mkdir -p ``path`` once per process; later calls skip the syscall."""
+    key = os.fspath(path)
+    if key in _ENSURED_DIRS:
+        return
+    path.mkdir(parents=True, exist_ok=True)
+    _ENSURED_DIRS.add(key)
 
+
+@lru_cache(maxsize=1)
 def locate_garak_site_root() -> Path:
     """Find the site-packages directory that contains the installed garak package."""
-    candidate_paths = []
-
-    site_paths = []
-    if hasattr(site, "getsitepackages"):
-        site_paths.extend(site.getsitepackages())
-    user_site = site.getusersitepackages()
-    if user_site:
-        site_paths.append(user_site)
-
-    for path_str in site_paths:
-        if not path_str:
-            continue
-        path_obj = Path(path_str)
-        if (path_obj / "garak").exists():
-            candidate_paths.append(path_obj)
-
-    if not candidate_paths:
+    # find_spec resolves garak exactly as an import would (editable installs and
+    # namespace layouts included) without probing every site directory.
+    spec = importlib.util.find_spec("garak")
+    if spec is None or not spec.submodule_search_locations:
         raise RuntimeError("Could not locate an installed garak package on sys.path.")
 
-    return sorted(candidate_paths)[0]
+    return Path(spec.submodule_search_locations[0]).parent
+
+
+def _ensure_model_ready(model_name: str) -> None:
+    # Deferred so --help and argparse errors exit without loading transformers.
+    # llm_utils already memoises the pipeline it builds, so no cache here.
+    from llm_utils import ensure_model_ready
+
+    ensure_model_ready(model_name)
+
+
+# garak.attempt.ATTEMPT_COMPLETE, and the default --eval_threshold at or above
+# which garak's ThresholdEvaluator marks a detector score as a failed test.
+_ATTEMPT_COMPLETE = 2
+_HIT_THRESHOLD = 0.5
+
+
+def _tally_report_line(line: bytes, stats: Dict[str, int]) -> None:
+    stats["records"] += 1
+    # garak 0.9 writes a Namespace string, a version line, then every attempt
+    # twice as attempt.as_dict(): once with status 1 from Probe.probe and once
+    # with status 2 and detector_results from Harness.run. The records carry
+    # no entry_type, so only the completed copy (uuid + status 2) is counted.
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return
+    if (
+        not isinstance(entry, dict)
+        or "uuid" not in entry
+        or entry.get("status") != _ATTEMPT_COMPLETE
+    ):
+        return
+    stats["attempts"] += 1
+    detector_results = entry.get("detector_results") or {}
+    if any(
+        score >= _HIT_THRESHOLD
+        for scores in detector_results.values()
+        for score in scores
+    ):
+        stats["hits"] += 1
 
 
 def copy_if_exists(source: Path, destination_dir: Path) -> Path | None:
     if source.exists():
-        destination_dir.mkdir(parents=True, exist_ok=True)
+        _ensure_dir(destination_dir)
         destination = destination_dir / source.name
+        # Always a byte copy: garak keeps appending to its site-root garak.log
+        # on later runs, so a shared inode would keep growing after the scan.
+        # Unlinking first also detaches a hardlink left by an earlier run.
+        destination.unlink(missing_ok=True)
         shutil.copy2(source, destination)
         return destination
     return None
 
 
+def _collect_report(
+    source: Path, destination_dir: Path, *, move: bool = True
+) -> tuple[Path, Dict[str, int]]:
+    """Move (or copy) a Garak JSONL report out and count its records."""
+    _ensure_dir(destination_dir)
+    destination = destination_dir / source.name
+    stats = {"records": 0, "attempts": 0, "hits": 0}
+
+    if move:
+        # A rename is one metadata syscall and, unlike a hardlink, leaves no
+        # inode shared with the site root, where a later run may reopen the
+        # same garak.<n>.jsonl name with "w" and truncate it.
+        try:
+            os.replace(source, destination)
+        except OSError:
+            pass  # cross-device: fall back to the copy below
+        else:
+            with open(destination, "rb") as report:
+                for line in report:
+                    _tally_report_line(line, stats)
+            return destination, stats
+
+    # Never write through a stale link into the source report.
+    destination.unlink(missing_ok=True)
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        for line in src:
+            dst.write(line)
+            _tally_report_line(line, stats)
+    shutil.copystat(source, destination)
+    if move:
+        source.unlink(missing_ok=True)
+    return destination, stats
+
+
+# garak 0.9 opens every report with json.dumps(str(args)), i.e. the argparse
+# Namespace repr, which is the only place a report records its probe spec.
+_REPORT_PROBES_PATTERN = re.compile(r"probes='([^']*)'")
+
+
+def _report_probes(report_path: Path) -> str | None:
+    """Return the ``--probes`` value recorded in a Garak report's header line."""
+    with open(report_path, "rb") as report:
+        header = report.readline()
+    try:
+        namespace = json.loads(header)
+    except ValueError:
+        return None
+    if not isinstance(namespace, str):
+        return None
+    match = _REPORT_PROBES_PATTERN.search(namespace)
+    return match.group(1) if match else None
+
+
+def _is_garak_report(name: str) -> bool:
+    return name.startswith("garak.") and name.endswith(".jsonl")
+
+
+def _snapshot_reports(garak_root: str) -> Dict[str, float]:
+    """Map Garak JSONL report names to mtimes without glob's per-entry fnmatch."""
+    with os.scandir(garak_root) as entries:
+        return {
+            entry.name: entry.stat().st_mtime
+            for entry in entries
+            if _is_garak_report(entry.name) and entry.is_file()
+        }
+
+
+def _run_garak(
+    *,
+    garak_root: Path,
+    model_name: str,
+    probes: str,
+    generations: int,
+    console_log: BinaryIO,
+) -> None:
+    """Run Garak in its own interpreter with ``garak_root`` as the working dir."""
+    # The child gets its CWD at exec time, so the parent's CWD is never touched
+    # and concurrent runs cannot race on a process-global os.chdir.
+    command = [
+        *_GARAK_BASE_ARGV,
+        "--model_name",
+        model_name,
+        "--probes",
+        probes,
+        "--generations",
+        str(generations),
+    ]
+    console = getattr(sys.stdout, "buffer", None)
+    with subprocess.Popen(
+        command,
+        cwd=garak_root,
+        env={**os.environ, "PYTHONIOENCODING": "utf-8"},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    ) as process:
+        # Tee the child's output: it stays visible on the console (e.g. the
+        # Jenkins log) and is archived as it streams. read1 keeps tqdm's
+        # carriage-return progress updates flowing instead of waiting for "\n".
+        for chunk in iter(lambda: process.stdout.read1(1 << 16), b""):
+            console_log.write(chunk)
+            if console is not None:
+                console.write(chunk)
+                console.flush()
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, command)
+
+
 def run_garak_scan(
     *,
     model_name: str,
     probes: str,
     generations: int,
     output_dir: Path,
-) -> Dict[str, str]:
-    """Execute Garak and collect the generated report/log files."""
-    ensure_model_ready(model_name)
+    parallel_probes: int = 1,
+    move_reports: bool = True,
+    pretty: bool = False,
+    model_ready: Future | None = None,
+) -> Dict[str, Any]:
+    """Execute Garak and collect the generated report/log files.
+
+    ``model_ready`` may carry an in-flight ``_ensure_model_ready`` call so
+    the model download overlaps with the setup below; it is awaited right
+    before Garak starts.
+    """
+    if model_ready is None:
+        _ensure_model_ready(model_name)
     garak_root = locate_garak_site_root()
-    output_dir.mkdir(parents=True, exist_ok=True)
+    _ensure_dir(output_dir)
 
-    existing_reports = set(garak_root.glob("garak.*.jsonl"))
+    # The pinned garak 0.9 has no --report_prefix and always writes
+    # garak.<n>.jsonl into its CWD, so new reports are found by diffing
+    # directory snapshots taken before and after the run.
+    garak_root_str = os.fspath(garak_root)
+    # Garak's own DEBUG log (logging.basicConfig in the child's CWD) is
+    # collected after the run; its console output is captured while it runs.
     log_path = garak_root / "garak.log"
+    console_log_path = output_dir / "garak.console.log"
+    probe_list = [probe.strip() for probe in probes.split(",") if probe.strip()]
+    parallel = parallel_probes > 1 and len(probe_list) > 1
 
-    with change_workdir(garak_root):
-        garak.cli.main(
-            [
-                "--model_type",
-                "huggingface",
-                "--model_name",
-                model_name,
-                "--probes",
-                probes,
-                "--generations",
-                str(generations),
-            ]
-        )
+    if model_ready is not None:
+        model_ready.result()
 
+    existing_reports = _snapshot_reports(garak_root_str)
+
+    with open(console_log_path, "wb") as console_log:
+        if parallel:
+            with ThreadPoolExecutor(max_workers=parallel_probes) as executor:
+                futures = [
+                    executor.submit(
+                        _run_garak,
+                        garak_root=garak_root,
+                        model_name=model_name,
+                        probes=probe,
+                        generations=generations,
+                        console_log=console_log,
+                    )
+                    for probe in probe_list
+                ]
+                for future in futures:
+                    future.result()
+        else:
+            _run_garak(
+                garak_root=garak_root,
+                model_name=model_name,
+                probes=probes,
+                generations=generations,
+                console_log=console_log,
+            )
+
+    current_reports = _snapshot_reports(garak_root_str)
+    # garak 0.9 names reports garak.<abs(hash(dir))>.jsonl, hashing the builtin
+    # dir function, i.e. its per-process object address; that can repeat
+    # across runs, so a changed mtime counts as new just like an unseen name.
     new_reports = sorted(
-        (set(garak_root.glob("garak.*.jsonl")) - existing_reports),
-        key=lambda path: path.stat().st_mtime,
+        (
+            name
+            for name, mtime in current_reports.items()
+            if existing_reports.get(name) != mtime
+        ),
+        key=current_reports.__getitem__,
     )
 
-    summary: Dict[str, str] = {
+    summary: Dict[str, Any] = {
         "model_name": model_name,
         "probes": probes,
         "generations": str(generations),
     }
 
-    if new_reports:
-        copied_report = copy_if_exists(new_reports[-1], output_dir)
-        if copied_report:
-            summary["report_file"] = str(copied_report)
+    copied_reports: List[str] = []
+    report_stats: Dict[str, Dict[str, int]] = {}
+    reports_by_probe: Dict[str, str] = {}
+    for report_name in new_reports:
+        copied_report, stats = _collect_report(
+            garak_root / report_name, output_dir, move=move_reports
+        )
+        copied_reports.append(str(copied_report))
+        report_stats[report_name] = stats
+        if parallel:
+            # Each parallel process ran exactly one probe; its report header
+            # says which one.
+            report_probes = _report_probes(copied_report)
+            if report_probes in probe_list:
+                reports_by_probe[report_probes] = str(copied_report)
+    if copied_reports:
+        summary["report_file"] = copied_reports[-1]
+        summary["report_files"] = copied_reports
+        summary["report_stats"] = report_stats
+    if reports_by_probe:
+        summary["reports_by_probe"] = reports_by_probe
 
     copied_log = copy_if_exists(log_path, output_dir)
     if copied_log:
         summary["log_file"] = str(copied_log)
+    summary["console_log_file"] = str(console_log_path)
 
     summary_path = output_dir / "garak_run_summary.json"
-    summary_path.write_text(json.dumps(summary, indent=2))
+    if pretty:
+        payload = json.dumps(summary, indent=2)
+    else:
+        payload = json.dumps(summary, separators=(",", ":"))
+    # Write to a sibling temp file and swap it in, so a crash never leaves a
+    # truncated summary behind.
+    tmp_path = summary_path.with_suffix(".json.tmp")
+    with open(tmp_path, "wb") as handle:
+        handle.write(payload.encode("utf-8"))
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, summary_path)
     return summary
 
 
@@ -151,17 +371,51 @@ def parse_args() -> argparse.Namespace:
         default=Path("artifacts") / "mlsecops",
         help="Directory where Garak reports/logs will be copied.",
     )
+    parser.add_argument(
+        "--parallel-probes",
+        type=int,
+        default=1,
+        help=(
+            "Run up to N probes concurrently, each in its own Garak process "
+            "(1 runs all probes in a single Garak process)."
+        ),
+    )
+    parser.add_argument(
+        "--pretty",
+        action="store_true",
+        help="Indent garak_run_summary.json for human reading.",
+    )
+    report_mode = parser.add_mutually_exclusive_group()
+    report_mode.add_argument(
+        "--move",
+        dest="move_reports",
+        action="store_true",
+        default=True,
+        help="Move new Garak reports into the output directory (default).",
+    )
+    report_mode.add_argument(
+        "--copy",
+        dest="move_reports",
+        action="store_false",
+        help="Copy new Garak reports and leave the originals in Garak's site root.",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
-    summary = run_garak_scan(
-        model_name=args.model_name,
-        probes=args.probes,
-        generations=args.generations,
-        output_dir=args.output_dir,
-    )
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        model_ready = executor.submit(_ensure_model_ready, args.model_name)
+        summary = run_garak_scan(
+            model_name=args.model_name,
+            probes=args.probes,
+            generations=args.generations,
+            output_dir=args.output_dir,
+            parallel_probes=args.parallel_probes,
+            move_reports=args.move_reports,
+            pretty=args.pretty,
+            model_ready=model_ready,
+        )
     print("Garak MLSecOps summary:", json.dumps(summary, indent=2))
     print(f"Reports copied under: {args.output_dir.resolve()}")
 